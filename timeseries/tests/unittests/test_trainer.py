@@ -1,8 +1,5 @@
 """Unit tests for trainers"""
-import copy
 import os
-import shutil
-import tempfile
 from collections import defaultdict
 from unittest import mock
 
@@ -12,6 +9,7 @@ import pytest
 import autogluon.core as ag
 from autogluon.common import space
 from autogluon.timeseries.dataset import TimeSeriesDataFrame
+from autogluon.timeseries.dataset.ts_dataframe import ITEMID
 from autogluon.timeseries.models import DeepARModel, ETSModel
 from autogluon.timeseries.models.ensemble.greedy_ensemble import TimeSeriesGreedyEnsemble
 from autogluon.timeseries.trainer.auto_trainer import AutoTimeSeriesTrainer
@@ -26,28 +24,49 @@ TEST_HYPERPARAMETER_SETTINGS = [
 TEST_HYPERPARAMETER_SETTINGS_EXPECTED_LB_LENGTHS = [1, 2]
 
 
-@pytest.fixture(scope="module")
-def trained_trainers():
-    trainers = {}
-    model_paths = []
-    for hp in TEST_HYPERPARAMETER_SETTINGS:
-        temp_model_path = tempfile.mkdtemp()
-        trainer = AutoTimeSeriesTrainer(
-            path=temp_model_path + os.path.sep,
-            eval_metric="MAPE",
-            prediction_length=3,
-        )
-        trainer.fit(
-            train_data=DUMMY_TS_DATAFRAME,
-            hyperparameters=hp,
-        )
-        trainers[repr(hp)] = trainer
-        model_paths.append(temp_model_path)
-
-    yield trainers
-
-    for td in model_paths:
-        shutil.rmtree(td)
+@pytest.fixture
+def dummy_ts():
+    """Shallow copy of DUMMY_TS_DATAFRAME for tests that fit their own trainer on it, so that fitting
+    does not leave state on the shared frame. Tests that only use the frame with trainers from shared
+    fixtures, which are fit on DUMMY_TS_DATAFRAME itself, use the constant directly."""
+    return DUMMY_TS_DATAFRAME.copy(deep=False)
+
+
+@pytest.fixture(scope="session")
+def get_or_fit(tmp_path_factory):
+    """Returns a function that fits a trainer on DUMMY_TS_DATAFRAME, reusing a previously fitted
+    trainer if one was already fit with the same hyperparameters and constructor arguments. Trainers
+    obtained this way are shared across tests and should not be modified."""
+    trainer_cache = {}
+
+    def _get_or_fit(hyperparameters, **trainer_kwargs):
+        key = (repr(hyperparameters), tuple(sorted(trainer_kwargs.items())))
+        if key not in trainer_cache:
+            trainer = AutoTimeSeriesTrainer(
+                path=str(tmp_path_factory.mktemp("trainer")) + os.path.sep,
+                **trainer_kwargs,
+            )
+            trainer.fit(
+                train_data=DUMMY_TS_DATAFRAME,
+                hyperparameters=hyperparameters,
+            )
+            trainer_cache[key] = trainer
+        return trainer_cache[key]
+
+    return _get_or_fit
+
+
+@pytest.fixture(
+    scope="module",
+    params=list(zip(TEST_HYPERPARAMETER_SETTINGS, TEST_HYPERPARAMETER_SETTINGS_EXPECTED_LB_LENGTHS)),
+    ids=lambda case: repr(case[0]),
+)
+def fit_case(request, get_or_fit):
+    """Returns a trainer fit with one of TEST_HYPERPARAMETER_SETTINGS, the hyperparameters and the
+    expected leaderboard length excluding the ensemble"""
+    hyperparameters, expected_board_length = request.param
+    trainer = get_or_fit(hyperparameters, eval_metric="MAPE", prediction_length=3)
+    return trainer, hyperparameters, expected_board_length
 
 
 def test_trainer_can_be_initialized(temp_model_path):
@@ -56,9 +75,9 @@ def test_trainer_can_be_initialized(temp_model_path):
 
 
 # smoke test for the short 'happy path'
-@pytest.mark.parametrize("hyperparameters", TEST_HYPERPARAMETER_SETTINGS)
-def test_when_trainer_called_then_training_is_performed(trained_trainers, hyperparameters):
-    assert trained_trainers[repr(hyperparameters)].get_model_names()
+def test_when_trainer_called_then_training_is_performed(fit_case):
+    trainer, _, _ = fit_case
+    assert trainer.get_model_names()
 
 
 @pytest.mark.parametrize("eval_metric", ["MAPE", None])
@@ -67,13 +86,9 @@ def test_when_trainer_called_then_training_is_performed(trained_trainers, hyperp
     zip(TEST_HYPERPARAMETER_SETTINGS, TEST_HYPERPARAMETER_SETTINGS_EXPECTED_LB_LENGTHS),
 )
 def test_given_hyperparameters_when_trainer_called_then_leaderboard_is_correct(
-    temp_model_path, eval_metric, hyperparameters, expected_board_length
+    get_or_fit, eval_metric, hyperparameters, expected_board_length
 ):
-    trainer = AutoTimeSeriesTrainer(path=temp_model_path, eval_metric=eval_metric)
-    trainer.fit(
-        train_data=DUMMY_TS_DATAFRAME,
-        hyperparameters=hyperparameters,
-    )
+    trainer = get_or_fit(hyperparameters, eval_metric=eval_metric)
     leaderboard = trainer.leaderboard()
 
     if len(hyperparameters) > 1:
@@ -82,14 +97,8 @@ def test_given_hyperparameters_when_trainer_called_then_leaderboard_is_correct(
     assert np.all(leaderboard["score_val"] < 0)  # all MAPEs should be negative
 
 
-@pytest.mark.parametrize(
-    "hyperparameters, expected_board_length",
-    zip(TEST_HYPERPARAMETER_SETTINGS, TEST_HYPERPARAMETER_SETTINGS_EXPECTED_LB_LENGTHS),
-)
-def test_given_test_data_when_trainer_called_then_leaderboard_is_correct(
-    trained_trainers, hyperparameters, expected_board_length
-):
-    trainer = trained_trainers[repr(hyperparameters)]
+def test_given_test_data_when_trainer_called_then_leaderboard_is_correct(fit_case):
+    trainer, hyperparameters, expected_board_length = fit_case
     test_data = get_data_frame_with_item_index(["A", "B", "C"])
 
     leaderboard = trainer.leaderboard(test_data)
@@ -98,26 +107,26 @@ def test_given_test_data_when_trainer_called_then_leaderboard_is_correct(
         expected_board_length += int(trainer.enable_ensemble)
 
     assert len(leaderboard) == expected_board_length
-    assert not np.any(np.isnan(leaderboard["score_test"]))
+    assert not leaderboard["score_test"].isna().any()
     assert np.all(leaderboard["score_test"] < 0)  # all MAPEs should be negative
 
 
-@pytest.mark.parametrize(
-    "hyperparameters, expected_board_length",
-    zip(TEST_HYPERPARAMETER_SETTINGS, TEST_HYPERPARAMETER_SETTINGS_EXPECTED_LB_LENGTHS),
-)
-def test_given_hyperparameters_when_trainer_called_then_model_can_predict(
-    trained_trainers, hyperparameters, expected_board_length
-):
-    trainer = trained_trainers[repr(hyperparameters)]
+def test_given_hyperparameters_when_trainer_called_then_model_can_predict(fit_case):
+    trainer, _, _ = fit_case
     predictions = trainer.predict(DUMMY_TS_DATAFRAME)
 
     assert isinstance(predictions, TimeSeriesDataFrame)
 
     predicted_item_index = predictions.item_ids
     assert all(predicted_item_index == DUMMY_TS_DATAFRAME.item_ids)  # noqa
-    assert all(len(predictions.loc[i]) == 3 for i in predicted_item_index)
-    assert not np.any(np.isnan(predictions))
+    assert (predictions.groupby(level=ITEMID, sort=False).size() == 3).all()
+    assert not predictions.isna().values.any()
+
+
+@pytest.fixture(scope="module")
+def template_trainer(tmp_path_factory):
+    temp_model_path = str(tmp_path_factory.mktemp("template_trainer")) + os.path.sep
+    return AutoTimeSeriesTrainer(path=temp_model_path, eval_metric="MAPE")
 
 
 @pytest.mark.parametrize(
@@ -131,10 +140,9 @@ def test_given_hyperparameters_when_trainer_called_then_model_can_predict(
     ],
 )
 def test_given_hyperparameters_when_trainer_model_templates_called_then_hyperparameters_set_correctly(
-    temp_model_path, hyperparameters
+    template_trainer, hyperparameters
 ):
-    trainer = AutoTimeSeriesTrainer(path=temp_model_path, eval_metric="MAPE")
-    models = trainer.construct_model_templates(
+    models = template_trainer.construct_model_templates(
         hyperparameters=hyperparameters,
     )
 
@@ -153,20 +161,22 @@ def test_given_hyperparameters_when_trainer_model_templates_called_then_hyperpar
         },
     ],
 )
-def test_given_hyperparameters_when_trainer_fit_then_freq_set_correctly(temp_model_path, hyperparameters):
+def test_given_hyperparameters_when_trainer_fit_then_freq_set_correctly(dummy_ts, temp_model_path, hyperparameters):
     trainer = AutoTimeSeriesTrainer(path=temp_model_path, eval_metric="MAPE")
     trainer.fit(
-        train_data=DUMMY_TS_DATAFRAME,
+        train_data=dummy_ts,
         hyperparameters=hyperparameters,
     )
 
     for model_name in trainer.get_model_names():
         model = trainer.load_model(model_name)
-        assert model.freq == DUMMY_TS_DATAFRAME.freq
+        assert model.freq == dummy_ts.freq
 
 
 @pytest.mark.parametrize("model_name", ["DeepAR", "SimpleFeedForward"])
-def test_given_hyperparameters_with_spaces_when_trainer_called_then_hpo_is_performed(temp_model_path, model_name):
+def test_given_hyperparameters_with_spaces_when_trainer_called_then_hpo_is_performed(
+    dummy_ts, temp_model_path, model_name
+):
     hyperparameters = {model_name: {"epochs": space.Int(1, 4)}}
     # mock the default hps factory to prevent preset hyperparameter configurations from
     # creeping into the test case
@@ -174,7 +184,7 @@ def test_given_hyperparameters_with_spaces_when_trainer_called_then_hpo_is_perfo
         default_hps_mock.return_value = defaultdict(dict)
         trainer = AutoTimeSeriesTrainer(path=temp_model_path)
         trainer.fit(
-            train_data=DUMMY_TS_DATAFRAME,
+            train_data=dummy_ts,
             hyperparameters=hyperparameters,
             hyperparameter_tune_kwargs={
                 "num_trials": 2,
@@ -200,10 +210,10 @@ def test_given_hyperparameters_with_spaces_when_trainer_called_then_hpo_is_perfo
     ],
 )
 def test_given_hyperparameters_with_lists_when_trainer_called_then_multiple_models_are_trained(
-    temp_model_path, hyperparameters, expected_model_names
+    dummy_ts, temp_model_path, hyperparameters, expected_model_names
 ):
     trainer = AutoTimeSeriesTrainer(path=temp_model_path, enable_ensemble=False)
-    trainer.fit(train_data=DUMMY_TS_DATAFRAME, hyperparameters=hyperparameters)
+    trainer.fit(train_data=dummy_ts, hyperparameters=hyperparameters)
     leaderboard = trainer.leaderboard()
     print(leaderboard["model"].values)
     print(expected_model_names)
@@ -226,11 +236,11 @@ def test_given_hyperparameters_with_lists_when_trainer_called_then_multiple_mode
     ],
 )
 def test_given_hyperparameters_and_custom_models_when_trainer_called_then_leaderboard_is_correct(
-    temp_model_path, eval_metric, hyperparameters, expected_board_length
+    dummy_ts, temp_model_path, eval_metric, hyperparameters, expected_board_length
 ):
     trainer = AutoTimeSeriesTrainer(path=temp_model_path, eval_metric=eval_metric)
     trainer.fit(
-        train_data=DUMMY_TS_DATAFRAME,
+        train_data=dummy_ts,
         hyperparameters=hyperparameters,
     )
     leaderboard = trainer.leaderboard()
@@ -272,6 +282,7 @@ def test_given_hyperparameters_and_custom_models_when_trainer_called_then_leader
     ],
 )
 def test_given_repeating_model_when_trainer_called_incrementally_then_name_collisions_are_prevented(
+    dummy_ts,
     temp_model_path,
     hyperparameter_list,
     expected_number_of_unique_names,
@@ -282,7 +293,7 @@ def test_given_repeating_model_when_trainer_called_incrementally_then_name_colli
     # incrementally train with new hyperparameters
     for hp in hyperparameter_list:
         trainer.fit(
-            train_data=DUMMY_TS_DATAFRAME,
+            train_data=dummy_ts,
             hyperparameters=hp,
         )
 
@@ -294,8 +305,25 @@ def test_given_repeating_model_when_trainer_called_incrementally_then_name_colli
         assert any(name.endswith(suffix) for name in model_names)
 
 
+@pytest.fixture(scope="module")
+def reloaded_trainer(request, tmp_path_factory):
+    """Fits a trainer with the hyperparameters given in request.param, then saves and deletes it.
+    Returns the names of the fitted models and the trainer loaded back from disk."""
+    temp_model_path = str(tmp_path_factory.mktemp("reloaded_trainer")) + os.path.sep
+    trainer = AutoTimeSeriesTrainer(path=temp_model_path, eval_metric="MAPE", prediction_length=2)
+    trainer.fit(
+        train_data=DUMMY_TS_DATAFRAME,
+        hyperparameters=request.param,
+    )
+    model_names = list(trainer.get_model_names())
+    trainer.save()
+    del trainer
+
+    return model_names, AutoTimeSeriesTrainer.load(path=temp_model_path)
+
+
 @pytest.mark.parametrize(
-    "hyperparameters",
+    "reloaded_trainer",
     [
         {"DeepAR": {"epochs": 1}, "SimpleFeedForward": {"epochs": 1}},
         {
@@ -303,21 +331,10 @@ def test_given_repeating_model_when_trainer_called_incrementally_then_name_colli
             "DeepAR": {"epochs": 1},
         },
     ],
+    indirect=True,
 )
-@pytest.mark.parametrize("low_memory", [True, False])
-def test_when_trainer_fit_and_deleted_models_load_back_correctly_and_can_predict(
-    temp_model_path, hyperparameters, low_memory
-):
-    trainer = AutoTimeSeriesTrainer(path=temp_model_path, eval_metric="MAPE", prediction_length=2)
-    trainer.fit(
-        train_data=DUMMY_TS_DATAFRAME,
-        hyperparameters=hyperparameters,
-    )
-    model_names = copy.copy(trainer.get_model_names())
-    trainer.save()
-    del trainer
-
-    loaded_trainer = AutoTimeSeriesTrainer.load(path=temp_model_path)
+def test_when_trainer_fit_and_deleted_models_load_back_correctly_and_can_predict(reloaded_trainer):
+    model_names, loaded_trainer = reloaded_trainer
 
     for m in model_names:
         loaded_model = loaded_trainer.load_model(m)
@@ -330,27 +347,25 @@ def test_when_trainer_fit_and_deleted_models_load_back_correctly_and_can_predict
 
         predicted_item_index = predictions.item_ids
         assert all(predicted_item_index == DUMMY_TS_DATAFRAME.item_ids)  # noqa
-        assert all(len(predictions.loc[i]) == 2 for i in predicted_item_index)
-        assert not np.any(np.isnan(predictions))
+        assert (predictions.groupby(level=ITEMID, sort=False).size() == 2).all()
+        assert not predictions.isna().values.any()
 
 
-def test_when_trainer_fit_and_deleted_then_oof_predictions_can_be_loaded(temp_model_path):
-    trainer = AutoTimeSeriesTrainer(path=temp_model_path, eval_metric="MAPE", prediction_length=2)
-    trainer.fit(
-        train_data=DUMMY_TS_DATAFRAME,
-        hyperparameters={
+@pytest.mark.parametrize(
+    "reloaded_trainer",
+    [
+        {
             "Naive": {},
             "ETS": {},
             "AutoETS": {"n_jobs": 1},
             "AutoGluonTabular": {"tabular_hyperparameters": {"GBM": {}}},
             "DeepAR": {"epochs": 1, "num_batches_per_epoch": 1},
         },
-    )
-    model_names = copy.copy(trainer.get_model_names())
-    trainer.save()
-    del trainer
-
-    loaded_trainer = AutoTimeSeriesTrainer.load(path=temp_model_path)
+    ],
+    indirect=True,
+)
+def test_when_trainer_fit_and_deleted_then_oof_predictions_can_be_loaded(reloaded_trainer):
+    model_names, loaded_trainer = reloaded_trainer
 
     oof_data = loaded_trainer._get_ensemble_oof_data(DUMMY_TS_DATAFRAME)
     for m in model_names:
@@ -360,46 +375,51 @@ def test_when_trainer_fit_and_deleted_then_oof_predictions_can_be_loaded(temp_mo
             loaded_trainer._score_with_predictions(oof_data, oof_predictions)
 
 
-@pytest.mark.parametrize("failing_model", ["NaiveModel", "SeasonalNaiveModel"])
-def test_given_base_model_fails_when_trainer_predicts_then_weighted_ensemble_can_predict(
-    temp_model_path, failing_model
-):
+@pytest.fixture(scope="module")
+def ensemble_trainer(tmp_path_factory):
+    temp_model_path = str(tmp_path_factory.mktemp("ensemble_trainer")) + os.path.sep
     trainer = AutoTimeSeriesTrainer(path=temp_model_path, enable_ensemble=False)
     trainer.fit(train_data=DUMMY_TS_DATAFRAME, hyperparameters={"Naive": {}, "SeasonalNaive": {}})
     ensemble = TimeSeriesGreedyEnsemble(name="WeightedEnsemble")
     ensemble.model_to_weight = {"Naive": 0.5, "SeasonalNaive": 0.5}
     trainer._add_model(ensemble, base_models=["Naive", "SeasonalNaive"])
     trainer.save_model(model=ensemble)
+    return trainer
+
 
+@pytest.mark.parametrize("failing_model", ["NaiveModel", "SeasonalNaiveModel"])
+def test_given_base_model_fails_when_trainer_predicts_then_weighted_ensemble_can_predict(
+    ensemble_trainer, failing_model
+):
     with mock.patch(f"autogluon.timeseries.models.local.naive.{failing_model}.predict") as fail_predict:
         fail_predict.side_effect = RuntimeError("Numerical error")
-        preds = trainer.predict(DUMMY_TS_DATAFRAME, model="WeightedEnsemble")
+        preds = ensemble_trainer.predict(DUMMY_TS_DATAFRAME, model="WeightedEnsemble")
         fail_predict.assert_called()
         assert isinstance(preds, TimeSeriesDataFrame)
 
 
 @pytest.mark.parametrize("failing_model", ["NaiveModel", "SeasonalNaiveModel"])
-def test_given_base_model_fails_when_trainer_scores_then_weighted_ensemble_can_score(temp_model_path, failing_model):
-    trainer = AutoTimeSeriesTrainer(path=temp_model_path, enable_ensemble=False)
-    trainer.fit(train_data=DUMMY_TS_DATAFRAME, hyperparameters={"Naive": {}, "SeasonalNaive": {}})
-    ensemble = TimeSeriesGreedyEnsemble(name="WeightedEnsemble")
-    ensemble.model_to_weight = {"Naive": 0.5, "SeasonalNaive": 0.5}
-    trainer._add_model(ensemble, base_models=["Naive", "SeasonalNaive"])
-    trainer.save_model(model=ensemble)
-
+def test_given_base_model_fails_when_trainer_scores_then_weighted_ensemble_can_score(ensemble_trainer, failing_model):
     with mock.patch(f"autogluon.timeseries.models.local.naive.{failing_model}.predict") as fail_predict:
         fail_predict.side_effect = RuntimeError("Numerical error")
-        score = trainer.score(DUMMY_TS_DATAFRAME, model="WeightedEnsemble")
+        score = ensemble_trainer.score(DUMMY_TS_DATAFRAME, model="WeightedEnsemble")
         fail_predict.assert_called()
         assert isinstance(score, float)
 
 
-def test_when_known_covariates_present_then_all_ensemble_base_models_can_predict(temp_model_path):
+@pytest.fixture(scope="module")
+def covariates_splits():
+    """Splits DATAFRAME_WITH_COVARIATES into the training data and the known covariates for the
+    last prediction_length time steps"""
     df = DATAFRAME_WITH_COVARIATES.copy()
     prediction_length = 2
     df_train = df.slice_by_timestep(None, -prediction_length)
-    df_future = df.slice_by_timestep(-prediction_length, None)
-    known_covariates = df_future.drop("target", axis=1)
+    known_covariates = df.slice_by_timestep(-prediction_length, None).drop("target", axis=1)
+    return df_train, known_covariates, prediction_length
+
+
+def test_when_known_covariates_present_then_all_ensemble_base_models_can_predict(temp_model_path, covariates_splits):
+    df_train, known_covariates, prediction_length = covariates_splits
 
     trainer = AutoTimeSeriesTrainer(path=temp_model_path, prediction_length=prediction_length, enable_ensemble=False)
     trainer.fit(df_train, hyperparameters={"ETS": {"maxiter": 1}, "DeepAR": {"epochs": 1, "num_batches_per_epoch": 1}})
@@ -420,9 +440,9 @@ def test_when_known_covariates_present_then_all_ensemble_base_models_can_predict
 
 
 @pytest.fixture(scope="module")
-def trained_and_refit_trainers():
+def trained_and_refit_trainers(tmp_path_factory):
     def fit_trainer():
-        temp_model_path = tempfile.mkdtemp()
+        temp_model_path = str(tmp_path_factory.mktemp("trainer"))
         trainer = AutoTimeSeriesTrainer(
             path=temp_model_path + os.path.sep,
             prediction_length=3,
@@ -443,7 +463,7 @@ def trained_and_refit_trainers():
     refit_trainer = fit_trainer()
     refit_trainer.refit_full("all")
 
-    yield trainer, refit_trainer
+    return trainer, refit_trainer
 
 
 def test_when_refit_full_called_then_all_models_are_retrained(trained_and_refit_trainers):
@@ -464,10 +484,10 @@ def test_when_refit_full_called_then_all_models_can_predict(trained_and_refit_tr
         assert len(preds) == DUMMY_TS_DATAFRAME.num_items * refit_trainer.prediction_length
 
 
-def test_when_refit_full_called_with_model_name_then_single_model_is_updated(temp_model_path):
+def test_when_refit_full_called_with_model_name_then_single_model_is_updated(dummy_ts, temp_model_path):
     trainer = AutoTimeSeriesTrainer(path=temp_model_path)
     trainer.fit(
-        DUMMY_TS_DATAFRAME,
+        dummy_ts,
         hyperparameters={
             "DeepAR": {"epochs": 1, "num_batches_per_epoch": 1},
             "SimpleFeedForward": {"epochs": 1, "num_batches_per_epoch": 1},